@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+from collections import defaultdict
+from functools import lru_cache
+
 import graphix
+import numpy as np
 import perceval as pcvl
-import sympy as sp
 from graphix.extraction import ResourceGraph, ResourceType, get_fusion_network_from_graph
 from perceval import components as comp
 
 from graphix_perceval.clifford import CLIFFORD_TO_PERCEVAL_POLAR
 from graphix_perceval.experiment import PercevalExperiment, Photon, PhotonType
 
+# Components are stored by reference in perceval circuits, so the fixed ones can be shared.
+_HWP_PI_8 = comp.HWP(np.pi / 8)  # Hadamard in polarization encoding
+_PBS = comp.PBS()
+
 
 def pattern2graphstate(
     pattern: graphix.Pattern,
+    vops: dict[int, int] | None = None,
 ) -> tuple[graphix.GraphState, dict[int, float], list[int]]:
     """Create a graph state from a MBQC pattern.
 
@@ -19,6 +27,9 @@ def pattern2graphstate(
     ----------
     pattern : :class:`graphix.Pattern` object
         MBQC pattern to be run on the device
+    vops : dict, optional
+        Local Clifford operators of the pattern, as returned by ``pattern.get_vops()``.
+        Computed from the pattern if not given.
 
     Returns
     -------
@@ -30,11 +41,10 @@ def pattern2graphstate(
         List of output nodes.
     """
     nodes, edges = pattern.get_graph()
-    vop_init = pattern.get_vops()
-    graph_state = graphix.GraphState(nodes=nodes, edges=edges, vops=vop_init)
-    phasedict = {}
-    for command in pattern.get_measurement_commands():
-        phasedict[command[1]] = command[3]
+    if vops is None:
+        vops = pattern.get_vops()
+    graph_state = graphix.GraphState(nodes=nodes, edges=edges, vops=vops)
+    phasedict = {command[1]: command[3] for command in pattern.get_measurement_commands()}
 
     output_nodes = pattern.output_nodes
     return graph_state, phasedict, output_nodes
@@ -55,13 +65,14 @@ def to_perceval(pattern: graphix.Pattern) -> PercevalExperiment:
     """
     if not isinstance(pattern, graphix.Pattern):
         raise TypeError("pattern must be a graphix.Pattern object")
-    graph_state, phasedict, output_nodes = pattern2graphstate(pattern)
-    ResourceGraphs = get_fusion_network_from_graph(graph_state)
     vops = pattern.get_vops()
+    graph_state, phasedict, output_nodes = pattern2graphstate(pattern, vops)
+    ResourceGraphs = get_fusion_network_from_graph(graph_state)
+    readouts = set(output_nodes)
 
     pcc = PercevalCircuitConstructor()
     for ResourceGraph in ResourceGraphs:
-        pcc.add_resourcegraph(ResourceGraph, phasedict, output_nodes)
+        pcc.add_resourcegraph(ResourceGraph, phasedict, readouts)
 
     pcc.add_fusions()
 
@@ -78,14 +89,27 @@ class PercevalCircuitConstructor:
     def __init__(self):
         self.num_photons = 0
         self.ResourceGraphs: list[ResourceGraph] = []
-        self.fusion_pairs: list[tuple[Photon, Photon]] = []
+        self.ghz_ResourceGraphs: list[ResourceGraph] = []
+        self.linear_ResourceGraphs: list[ResourceGraph] = []
+        # ids of the fused photon pairs, stored as two parallel lists
+        self.fusion_ph1_ids: list[int] = []
+        self.fusion_ph2_ids: list[int] = []
         self.photons: list[Photon] = []
-        self.node_id2photon_ids: dict[int, list[int]] = {}
+        self.node_id2photon_ids: defaultdict[int, list[int]] = defaultdict(list)
         self.clifford_comps: list[comp.BS] = []
+        self._readout_ids: list[int] = []
+        self._compute_ids: list[int] = []
+        self._witness_ids: list[int] = []
         self._is_fused: bool = False
         self._clifford_applied: bool = False
 
-    def add_resourcegraph(self, ResourceGraph: ResourceGraph, phasedict: dict[int, float], readouts: list) -> None:
+    @property
+    def fusion_pairs(self) -> list[tuple[Photon, Photon]]:
+        """Pairs of fused photons, where the second photon is the witness."""
+        photons = self.photons
+        return [(photons[i], photons[j]) for i, j in zip(self.fusion_ph1_ids, self.fusion_ph2_ids)]
+
+    def add_resourcegraph(self, ResourceGraph: ResourceGraph, phasedict: dict[int, float], readouts: set[int]) -> None:
         if self._is_fused:
             raise RuntimeError("Cannot add ResourceGraph after fusion")
         for node_id in ResourceGraph.graph.nodes:
@@ -93,47 +117,57 @@ class PercevalCircuitConstructor:
                 ph = Photon(
                     exp_id=self.num_photons, type=PhotonType.READOUT, node_id=node_id, angle=phasedict.get(node_id)
                 )
+                self._readout_ids.append(self.num_photons)
             else:
                 ph = Photon(
                     exp_id=self.num_photons, type=PhotonType.COMPUTE, node_id=node_id, angle=phasedict.get(node_id)
                 )
-            if self.node_id2photon_ids.get(node_id) is not None:
-                self.node_id2photon_ids[node_id].append(self.num_photons)
-            else:
-                self.node_id2photon_ids[node_id] = [self.num_photons]
-            self.num_photons += 1
+                self._compute_ids.append(self.num_photons)
+            self.node_id2photon_ids[node_id].append(self.num_photons)
             self.photons.append(ph)
+            self.num_photons += 1
 
-        if ResourceGraph.type in (ResourceType.GHZ, ResourceType.LINEAR):
-            self.ResourceGraphs.append(ResourceGraph)
+        if ResourceGraph.type == ResourceType.GHZ:
+            self.ghz_ResourceGraphs.append(ResourceGraph)
+        elif ResourceGraph.type == ResourceType.LINEAR:
+            self.linear_ResourceGraphs.append(ResourceGraph)
         else:
             raise TypeError(f"ResourceType {ResourceGraph.type} is not supported")
+        self.ResourceGraphs.append(ResourceGraph)
 
     def get_readouts(self) -> list[Photon]:
-        return [ph for ph in self.photons if ph.type == PhotonType.READOUT]
+        return [self.photons[i] for i in self._readout_ids]
 
     def get_computes(self) -> list[Photon]:
-        return [ph for ph in self.photons if ph.type == PhotonType.COMPUTE]
+        return [self.photons[i] for i in self._compute_ids]
 
     def get_witnesses(self) -> list[Photon]:
-        return [ph for ph in self.photons if ph.type == PhotonType.WITNESS]
+        return [self.photons[i] for i in self._witness_ids]
 
     def add_fusions(self) -> None:
         """Find edges that connects two ResourceGraphs.
         If the two ResourceGraphs share a same node id, then they are fused.
         Type-1 fusion.
         """
-        for _, photon_ids in self.node_id2photon_ids.items():
-            fusing_photons = sorted(photon_ids)
-            for idx in range(len(fusing_photons) - 1):
-                self.fusion_pairs.append((self.photons[fusing_photons[idx]], self.photons[fusing_photons[idx + 1]]))
+        witness_ids = set()
+        # photon ids are appended in increasing order in add_resourcegraph, so each list is already sorted
+        for photon_ids in self.node_id2photon_ids.values():
+            for ph1_id, ph2_id in zip(photon_ids, photon_ids[1:]):
+                self.fusion_ph1_ids.append(ph1_id)
+                self.fusion_ph2_ids.append(ph2_id)
                 # Note that the photon with the larger index is the witness
-                self.photons[fusing_photons[idx + 1]].type = PhotonType.WITNESS
+                self.photons[ph2_id].type = PhotonType.WITNESS
+                witness_ids.add(ph2_id)
+
+        # Move the witness photons out of the readout/compute buckets
+        self._readout_ids = [i for i in self._readout_ids if i not in witness_ids]
+        self._compute_ids = [i for i in self._compute_ids if i not in witness_ids]
+        self._witness_ids = sorted(witness_ids)
 
         self._is_fused = True
 
     def get_all_resourcegraphs(self) -> list[ResourceGraph]:
-        return self.ghz_ResourceGraphs | self.linear_ResourceGraphs
+        return list(self.ResourceGraphs)
 
     def setup_perceval_circuit(self, name: str | None = None, merge: bool = False) -> pcvl.Circuit:
         if not self._is_fused:
@@ -141,58 +175,40 @@ class PercevalCircuitConstructor:
         if not self._clifford_applied:
             raise RuntimeError("Must apply local clifford before setting up perceval circuit")
         circ = pcvl.Circuit(self.num_photons * 2, name=name)
+        add = circ.add  # bound once, as it is called for every photon below
         # Create circuits for all the ResourceGraphs
         photon_idx = 0
         for cl in self.ResourceGraphs:
-            if cl.type == ResourceType.GHZ:
-                circ.add(
-                    [idx for idx in range(photon_idx, photon_idx + len(cl.graph.nodes))],
-                    ghz_circuit(len(cl.graph.nodes)),
-                    merge,
-                )
-            elif cl.type == ResourceType.LINEAR:
-                circ.add(
-                    [idx for idx in range(photon_idx, photon_idx + len(cl.graph.nodes))],
-                    linear_circuit(len(cl.graph.nodes)),
-                    merge,
-                )
-            photon_idx += len(cl.graph.nodes)
+            n = len(cl.graph.nodes)
+            add(tuple(range(photon_idx, photon_idx + n)), _RESOURCE_CIRCUIT_BUILDERS[cl.type](n), merge)
+            photon_idx += n
 
-        circ.add(0, comp.PERM(list(range(self.num_photons))))  # work as a barrier
+        add(0, _identity_perm(self.num_photons))  # work as a barrier
 
         # Create circuits for all the Fusions
-        for ph1, ph2 in self.fusion_pairs:
-            circ.add(list(range(ph1.id, ph2.id + 1)), fusion_circuit(ph1, ph2), merge)
+        for ph1_id, ph2_id in zip(self.fusion_ph1_ids, self.fusion_ph2_ids):
+            # add_fusions guarantees ph1_id < ph2_id and that ph2_id is the witness
+            add(tuple(range(ph1_id, ph2_id + 1)), _fusion_circuit(ph1_id, ph2_id), merge)
 
-        circ.add(0, comp.PERM(list(range(self.num_photons))))  # work as a barrier
+        add(0, _identity_perm(self.num_photons))  # work as a barrier
 
         # Add local clifford
         for photon_id, clifford_comp in self.clifford_comps:
-            circ.add(photon_id, clifford_comp)
+            add(photon_id, clifford_comp)
 
-        circ.add(0, comp.PERM(list(range(self.num_photons * 2))))  # work as a barrier
+        add(0, _identity_perm(self.num_photons * 2))  # work as a barrier
 
         # Convert measurement basis
-        for ph in self.photons:
-            if ph.type == PhotonType.COMPUTE:
-                circ.add(ph.id, comp.QWP(ph.angle[0]))
-                circ.add(ph.id, comp.HWP(ph.angle[1]))
+        for ph in self.get_computes():
+            add(ph.id, comp.QWP(ph.angle[0]))
+            add(ph.id, comp.HWP(ph.angle[1]))
 
         # Currently, Perceval does not support measurement in polarization, so we need to convert it to dual-rail encoding.
         # |{P:H},0> -> |0,1> = |0> (this is the opposite of the definition in perceval)
         # |{P:V},0> -> |1,0> = |1> (this is the opposite of the definition in perceval)
-        circ.add(
-            0,
-            comp.PERM(
-                sum(
-                    list([2 * i] for i in range(0, self.num_photons))
-                    + list([2 * i + 1] for i in range(0, self.num_photons)),
-                    [],
-                )
-            ),
-        )
+        add(0, comp.PERM(list(range(0, 2 * self.num_photons, 2)) + list(range(1, 2 * self.num_photons, 2))))
         for i in range(0, self.num_photons):
-            circ.add(i * 2, comp.PBS())
+            add(i * 2, _PBS)
 
         return circ
 
@@ -200,13 +216,21 @@ class PercevalCircuitConstructor:
         if not self._is_fused:
             raise RuntimeError("Must fuse before applying local clifford")
         for node_id, cid in vops.items():
+            if cid == 0:  # identity
+                continue
             for ph_id in self.node_id2photon_ids[node_id]:
-                if self.photons[ph_id].type != PhotonType.WITNESS:
-                    self.clifford_comps.append((ph_id, local_clifford_circuit(cid)))
+                if self.photons[ph_id].type is not PhotonType.WITNESS:
+                    self.clifford_comps.append((ph_id, _local_clifford_circuit_cached(cid)))
 
         self._clifford_applied = True
 
 
+@lru_cache
+def _identity_perm(num_modes: int) -> comp.PERM:
+    """Create an identity permutation over ``num_modes`` modes, used as a barrier between circuit stages."""
+    return comp.PERM(list(range(num_modes)))
+
+
 def local_clifford_circuit(clifford_id: int) -> pcvl.Circuit:
     """Create a Perceval Circuit for a local clifford.
 
@@ -224,6 +248,12 @@ def local_clifford_circuit(clifford_id: int) -> pcvl.Circuit:
     """
     if not 0 <= clifford_id <= 23:
         raise ValueError("clifford_id must be in [0, 23]")
+    return _local_clifford_circuit_cached(clifford_id).copy()
+
+
+@lru_cache(maxsize=24, typed=True)
+def _local_clifford_circuit_cached(clifford_id: int) -> pcvl.Circuit:
+    """Shared, cached version of :func:`local_clifford_circuit`, which must not be modified."""
     circ = pcvl.Circuit(m=1, name="LOCAL CLIFFORD ID:" + str(clifford_id))
     for comps in CLIFFORD_TO_PERCEVAL_POLAR[clifford_id]:
         circ.add(0, comps)
@@ -247,20 +277,34 @@ def fusion_circuit(ph1: Photon, ph2: Photon) -> pcvl.Circuit:
     """
     if not isinstance(ph1, Photon) or not isinstance(ph2, Photon):
         raise TypeError("ph1 and ph2 must be Photon objects")
-    if ph1.type == PhotonType.WITNESS and ph1.id > ph2.id:
+    if ph1.type is PhotonType.WITNESS and ph1.id > ph2.id:
         ph1, ph2 = ph2, ph1
-    if ph2.type != PhotonType.WITNESS:
+    if ph2.type is not PhotonType.WITNESS:
         raise ValueError("The second photon must be a witness")
-    l = ph2.id - ph1.id
-    circ = pcvl.Circuit(m=l + 1, name="FUSE " + str(ph1.id) + "-" + str(ph2.id))
+    return _fusion_circuit(ph1.id, ph2.id)
+
+
+def _fusion_circuit(ph1_id: int, ph2_id: int) -> pcvl.Circuit:
+    """Create the fusion circuit for already validated photon ids, where ``ph2_id`` is the witness."""
+    l = ph2_id - ph1_id
+    circ = pcvl.Circuit(m=l + 1, name="FUSE " + str(ph1_id) + "-" + str(ph2_id))
+    circ.add(0, _fusion_body(l), merge=True)
+    return circ
+
+
+@lru_cache
+def _fusion_body(l: int) -> pcvl.Circuit:
+    """Create the body of a fusion circuit, which only depends on the distance between the fused photons."""
+    circ = pcvl.Circuit(m=l + 1)
     # If the photons are not neighbors, we swap the ph2 and the photon next to ph1,
     # do the fusion and swap back.
     if l > 1:
-        a, *b, c = list(range(0, l))
-        perm = comp.PERM([c, *b, a])
+        perm_list = list(range(l))
+        perm_list[0], perm_list[-1] = perm_list[-1], perm_list[0]
+        perm = comp.PERM(perm_list)
         circ.add(1, perm)
-    circ.add((0, 1), comp.PBS())
-    circ.add(1, comp.HWP(sp.pi / 8))
+    circ.add((0, 1), _PBS)
+    circ.add(1, _HWP_PI_8)
     if l > 1:
         circ.add(1, perm)
     return circ
@@ -281,17 +325,23 @@ def linear_circuit(num_photons: int, name: str = "") -> pcvl.Circuit:
     """
     if not isinstance(num_photons, int):
         raise TypeError("num_photons must be an integer")
+    return _linear_circuit_cached(num_photons, name).copy()
+
+
+@lru_cache(typed=True)
+def _linear_circuit_cached(num_photons: int, name: str = "") -> pcvl.Circuit:
+    """Shared, cached version of :func:`linear_circuit`, which must not be modified."""
     circ = pcvl.Circuit(m=num_photons, name="LINEAR " + name)
     for i in range(num_photons):
-        circ.add(i, comp.HWP(sp.pi / 8))
+        circ.add(i, _HWP_PI_8)
 
     for i in range(num_photons - 1):
-        circ.add((i, i + 1), comp.PBS())
+        circ.add((i, i + 1), _PBS)
         if i >= 1 and i != num_photons - 2:
-            circ.add(i + 1, comp.HWP(sp.pi / 8))
-    circ.add(0, comp.PERM(list(range(num_photons))))  # work as a barrier
-    circ.add(0, comp.HWP(sp.pi / 8))
-    circ.add(num_photons - 1, comp.HWP(sp.pi / 8))
+            circ.add(i + 1, _HWP_PI_8)
+    circ.add(0, _identity_perm(num_photons))  # work as a barrier
+    circ.add(0, _HWP_PI_8)
+    circ.add(num_photons - 1, _HWP_PI_8)
 
     return circ
 
@@ -311,14 +361,25 @@ def ghz_circuit(num_photons: int, name: str = "") -> pcvl.Circuit:
     """
     if not isinstance(num_photons, int):
         raise TypeError("num_photons must be an integer")
+    return _ghz_circuit_cached(num_photons, name).copy()
+
+
+@lru_cache(typed=True)
+def _ghz_circuit_cached(num_photons: int, name: str = "") -> pcvl.Circuit:
+    """Shared, cached version of :func:`ghz_circuit`, which must not be modified."""
     circ = pcvl.Circuit(m=num_photons, name="GHZ " + name)
     for i in range(num_photons):
-        circ.add(i, comp.HWP(sp.pi / 8))
+        circ.add(i, _HWP_PI_8)
 
     for i in range(num_photons - 1):
-        circ.add((i, i + 1), comp.PBS())
+        circ.add((i, i + 1), _PBS)
 
     for i in range(1, num_photons):
-        circ.add(i, comp.HWP(sp.pi / 8))  # Hadamard
+        circ.add(i, _HWP_PI_8)  # Hadamard
 
     return circ
+
+
+# cached builders of the perceval circuit for each supported resource graph type;
+# the circuits are shared between experiments, as perceval stores sub-circuits by reference
+_RESOURCE_CIRCUIT_BUILDERS = {ResourceType.GHZ: _ghz_circuit_cached, ResourceType.LINEAR: _linear_circuit_cached}
@@ -1,17 +1,17 @@
 from __future__ import annotations
 
 import collections
-import itertools
+import math
 import sys
 import warnings
 from enum import Enum
+from operator import itemgetter
 
+import numpy as np
 import perceval as pcvl
-import sympy as sp
 from _collections_abc import dict_items
 from perceval.algorithm import Sampler
 from perceval.utils import PostSelect
-from tabulate import tabulate
 
 IS_NOTEBOOK = "ipykernel" in sys.modules
 if IS_NOTEBOOK:
@@ -29,16 +29,22 @@ class PhotonType(Enum):
         return self.name
 
 
+# QWP and HWP angles for the X-basis measurement
+_DEFAULT_ANGLE = (math.pi / 4, math.pi / 8)
+
+
 class Photon:
+    __slots__ = ("id", "type", "node_id", "angle")
+
     def __init__(self, exp_id: int, type: PhotonType, node_id: int = 0, angle: float | None = None):
         self.id = exp_id
         self.type = type
         self.node_id = node_id
         # angle for QWP and HWP
         if angle:
-            self.angle = [sp.pi / 4, (sp.pi - (2 * angle * sp.pi)) / 8]
+            self.angle = [_DEFAULT_ANGLE[0], (math.pi - (2 * angle * math.pi)) / 8]
         else:
-            self.angle = [sp.pi / 4, sp.pi / 8]  # X-basis measurement
+            self.angle = list(_DEFAULT_ANGLE)  # X-basis measurement
 
     def __str__(self) -> str:
         return f"Photon(ID:{str(self.id)} Node:{str(self.node_id)} ({str(self.type)}))"
@@ -72,9 +78,19 @@ class PercevalExperiment:
         """
         self.circ = circuit
         self.photons = photons
+        self._group_photons()
         self.processor = None
         self.input_state = None
-        self.output_states: dict[str, str] | None = None
+        # table of output states, only built when `output_states` is accessed; results are formatted through it
+        # once it exists, so that edits by the user are taken into account
+        self._output_states: dict[str, str] | None = None
+        # the output states are described by the modes of the readout photons and the fixed occupation of the
+        # other modes, see `set_output_states`
+        self._readout_modes: list[int] | None = None
+        self._fixed_output_state: list[int] | None = None
+        # postselection only depends on the photon layout, see `_photon_layout`
+        self._postselect_cache: dict[tuple, PostSelect] = {}
+        self._postselection_applied = False
 
     def set_local_processor(self, backend: str, source: pcvl.Source = pcvl.Source(), name: str = None):
         r"""Set the local computing backend.
@@ -95,6 +111,7 @@ class PercevalExperiment:
             warnings.warn("The processor has already been set. The previous processor will be overwritten.")
         self.processor = pcvl.Processor(backend=backend, m_circuit=self.circ, source=source, name=name)
         self.backend = backend
+        self._postselection_applied = False
 
         self.set_input_state()
         self.set_output_states()
@@ -117,6 +134,7 @@ class PercevalExperiment:
         self.processor = pcvl.RemoteProcessor(name=backend, token=token)
         self.processor.set_circuit(self.circ)
         self.backend = backend
+        self._postselection_applied = False
 
         self.set_input_state()
         self.set_output_states()
@@ -130,12 +148,8 @@ class PercevalExperiment:
                 "No processor has been set. Please set a processor by `set_local_processor` or `set_remote_procesor` before running the experiment."
             )
 
-        input_state = "|"
-        input_state = input_state + ",".join([r"{P:H}" for _ in range(len(self.photons))])
-        input_state = input_state + "," + ",".join(["0"] * len(self.photons))
-        input_state = input_state + ">"
-
-        self.input_state = pcvl.BasicState(input_state)
+        n = len(self.photons)
+        self.input_state = pcvl.BasicState("|" + ",".join([r"{P:H}"] * n + ["0"] * n) + ">")
         self.processor.with_polarized_input(self.input_state)  # not with_input (it will not work for polarized input)
 
     def set_output_states(self):
@@ -146,32 +160,67 @@ class PercevalExperiment:
         - The witness photons are in ``|{P:H}>`` and translated to ``|0,1>``
         - The computing photons are in ``|{P:H}>`` and translated to ``|0,1>``
         - The readout photons are in ``|{P:H}>`` or ``|{P:V}>``
+
+        The table of all :math:`2^R` output states for :math:`R` readout photons is only built
+        when :attr:`output_states` is accessed; results are labelled directly from the readout modes.
         """
         if self.processor is None:
             raise Exception(
                 "No processor has been set. Please set a processor by `set_local_processor` or `set_remote_procesor` before running the experiment."
             )
-        (readouts, witnesses, comps) = (
-            self.get_readout_photons(),
-            self.get_witness_photons(),
-            self.get_compute_photons(),
-        )
-        out_states = {}
-        x = 0
-        (zero, one) = ([0, 1], [1, 0])
-        for st in itertools.product([zero, one], repeat=len(readouts)):
-            basic_out_state = [[]] * len(self.photons)
-            for w in witnesses:
-                basic_out_state[w.id] = zero
-            for c in comps:
-                basic_out_state[c.id] = zero
-            for i in range(len(readouts)):
-                basic_out_state[readouts[i].id] = st[i]
-            out_states[
-                str(pcvl.BasicState(list(itertools.chain.from_iterable(basic_out_state))))
-            ] = f"|{x:0{len(readouts)}b}>"
-            x = x + 1
-        self.output_states = out_states
+        self._group_photons()
+        # |0> is translated to |0,1> and |1> to |1,0>; witness and computing photons are always in |0>.
+        fixed_state = [0] * (2 * len(self.photons))
+        for photon_type in (PhotonType.COMPUTE, PhotonType.WITNESS):
+            for ph in self._photons_by_type[photon_type]:
+                fixed_state[2 * ph.id + 1] = 1
+        self._readout_modes = [2 * ph.id for ph in self._photons_by_type[PhotonType.READOUT]]
+        self._fixed_output_state = fixed_state
+        self._output_states = None
+
+    @property
+    def output_states(self) -> dict[str, str] | None:
+        """Mapping from the output states, in the string form of :class:`perceval.BasicState`, to the readout states.
+
+        Built on first access after :meth:`set_output_states`. From then on, the results are formatted with this
+        mapping, including any modification made to it, until :meth:`set_output_states` is called again.
+        """
+        if self._output_states is None and self._readout_modes is not None:
+            self._output_states = self._build_output_states()
+        return self._output_states
+
+    @output_states.setter
+    def output_states(self, output_states: dict[str, str] | None):
+        self._output_states = output_states
+
+    def _build_output_states(self) -> dict[str, str]:
+        n_readouts = len(self._readout_modes)
+        dual_rail = ("0,1", "1,0")
+        # Output states only differ in the readout modes, so we format them from a template in the form of
+        # str(pcvl.BasicState(...)), where the i-th readout photon is the placeholder {i}.
+        modes = [str(occupation) for occupation in self._fixed_output_state]
+        for i, mode in enumerate(self._readout_modes):
+            modes[mode] = "{" + str(i) + "}"
+            modes[mode + 1] = None
+        template = "|" + ",".join(mode for mode in modes if mode is not None) + ">"
+        # the first readout photon corresponds to the most significant bit
+        shifts = range(n_readouts - 1, -1, -1)
+        label_format = f"0{n_readouts}b"
+        labels = ["|" + format(x, label_format) + ">" for x in range(1 << n_readouts)]
+        keys = [template.format(*[dual_rail[(x >> shift) & 1] for shift in shifts]) for x in range(1 << n_readouts)]
+        return dict(zip(keys, labels))
+
+    def _output_state_label(self, state: pcvl.BasicState) -> str | None:
+        """Return the readout state corresponding to an output state, or None if it is not an output state."""
+        occupations = list(state)
+        bits = [occupations[mode] for mode in self._readout_modes]
+        expected = list(self._fixed_output_state)
+        for mode, bit in zip(self._readout_modes, bits):
+            expected[mode] = bit
+            expected[mode + 1] = 1 - bit
+        if occupations != expected:
+            return None
+        return "|" + ("".join(map(str, bits)) or "0") + ">"
 
     def get_probability_distribution(
         self, format_result: bool = True, postselection: bool = True
@@ -194,16 +243,16 @@ class PercevalExperiment:
             raise Exception(
                 "No processor has been set. Please set a processor by `set_local_processor` or `set_remote_procesor` before running the experiment."
             )
-        if postselection:
+        if postselection and not self._postselection_applied:
             self.set_postselection()
 
         sampler = Sampler(self.processor)
-        probs = PhotonDistribution(sampler.probs()["results"])
+        results = sampler.probs()["results"]
 
         if format_result:
-            probs.replace_keys(self.output_states)
+            results = self._format_results(results)
 
-        return probs
+        return PhotonDistribution(results)
 
     def sample(self, num_samples=1024, format_result: bool = True, postselection: bool = True) -> PhotonCount:
         """Run the MBQC pattern on IBMQ devices
@@ -226,37 +275,70 @@ class PercevalExperiment:
             raise Exception(
                 "No processor has been set. Please set a processor by `set_local_processor` or `set_remote_procesor` before running the experiment."
             )
-        if postselection:
+        if postselection and not self._postselection_applied:
             self.set_postselection()
 
         sampler = Sampler(self.processor)
-        sample_result = PhotonCount(collections.Counter(sampler.samples(num_samples)["results"]))
+        # Samples are BasicState objects, which Counter hashes directly. Sampler.sample_count is not used
+        # as it approximates the counts when the backend only provides probabilities.
+        results = collections.Counter(sampler.samples(num_samples)["results"])
 
         if format_result:
-            sample_result.replace_keys(self.output_states)
+            results = self._format_results(results)
 
-        return sample_result
+        return PhotonCount(results)
+
+    def _format_results(self, results: dict) -> dict:
+        """Replace the BasicState keys of perceval results by the readout states, dropping the other states.
+
+        This is equivalent to `replace_keys` with `output_states`. The results are labelled directly from the
+        readout modes as long as the table of output states has not been built or assigned.
+        """
+        output_states = self._output_states
+        if output_states is not None:
+            labels = ((output_states.get(str(state)), value) for state, value in results.items())
+            return {label: value for label, value in labels if label is not None}
+        labels = ((self._output_state_label(state), value) for state, value in results.items())
+        return {label: value for label, value in labels if label is not None}
 
     def set_postselection(self):
         """Postselect the results according to the pattern."""
-        ps = PostSelect()
-        for ph in self.get_readout_photons():
-            ps.eq([2 * ph.id, 2 * ph.id + 1], 1)
-        for ph in self.get_compute_photons():
-            ps.eq([2 * ph.id], 0).eq([2 * ph.id + 1], 1)
-        for ph in self.get_witness_photons():
-            ps.eq([2 * ph.id], 0).eq([2 * ph.id + 1], 1)
+        layout = self._photon_layout()
+        ps = self._postselect_cache.get(layout)
+        if ps is None:
+            self._group_photons()
+            ps = PostSelect()
+            eq = ps.eq
+            for ph in self._photons_by_type[PhotonType.READOUT]:
+                eq([2 * ph.id, 2 * ph.id + 1], 1)
+            # computing and witness photons share the same constraint
+            for photon_type in (PhotonType.COMPUTE, PhotonType.WITNESS):
+                for ph in self._photons_by_type[photon_type]:
+                    eq([2 * ph.id], 0)
+                    eq([2 * ph.id + 1], 1)
+            self._postselect_cache[layout] = ps
 
         self.processor.set_postselection(ps)
+        self._postselection_applied = True
+
+    def _photon_layout(self) -> tuple:
+        """Fingerprint of the photon ids and types, which determine the output states and postselection."""
+        return tuple(ph.type for ph in self.photons), tuple(ph.id for ph in self.photons)
+
+    def _group_photons(self):
+        """Group the photons by type. Must be called again if the photons or their types are modified."""
+        self._photons_by_type: dict[PhotonType, list[Photon]] = {photon_type: [] for photon_type in PhotonType}
+        for ph in self.photons:
+            self._photons_by_type[ph.type].append(ph)
 
     def get_readout_photons(self):
-        return [ph for ph in self.photons if ph.type == PhotonType.READOUT]
+        return list(self._photons_by_type[PhotonType.READOUT])
 
     def get_compute_photons(self):
-        return [ph for ph in self.photons if ph.type == PhotonType.COMPUTE]
+        return list(self._photons_by_type[PhotonType.COMPUTE])
 
     def get_witness_photons(self):
-        return [ph for ph in self.photons if ph.type == PhotonType.WITNESS]
+        return list(self._photons_by_type[PhotonType.WITNESS])
 
 
 class PhotonCount(dict):
@@ -264,23 +346,25 @@ class PhotonCount(dict):
 
     perceval.BSCount does not seem to show fock state with one qubit properly."""
 
-    def __init__(self, counts: dict[str, int] = {}):
+    def __init__(self, counts: dict[str, int] | None = None):
+        super().__init__()
+        if counts is None:
+            self.counts = {}
+            return
         if not isinstance(counts, dict):
             raise TypeError("counts must be a dictionary.")
-        super().__init__()
-        self.counts = dict(counts)
+        # keys are normalized to str once, as perceval may return BasicState keys
+        self.counts = {str(key): value for key, value in counts.items()}
 
     def __str__(self) -> str:
         return str(self.counts)
 
-    def __getitem__(self, key: str) -> int:
-        if not isinstance(key, str):
-            raise TypeError("key must be a string.")
-        return self.counts[key]
+    def __getitem__(self, key: str | pcvl.BasicState) -> int:
+        return self.counts[key if isinstance(key, str) else str(key)]
 
-    def __setitem__(self, key: str, value: int):
+    def __setitem__(self, key: str | pcvl.BasicState, value: int):
         if not isinstance(key, str):
-            raise TypeError("key must be a string.")
+            key = str(key)
         if not (isinstance(value, int) and value >= 0):
             raise TypeError("value must be a positive integer.")
         self.counts[key] = value
@@ -288,6 +372,10 @@ class PhotonCount(dict):
     def items(self) -> dict_items:
         return self.counts.items()
 
+    def as_array(self) -> tuple[list[str], np.ndarray]:
+        """Return the measurement results and their counts as a list of labels and an array in the same order."""
+        return list(self.counts), np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+
     def draw(self, sort: bool = True):
         """Draw the counts result in a table.
 
@@ -299,12 +387,14 @@ class PhotonCount(dict):
         sort : bool, optional
             Whether to sort the counts by the key.
         """
+        from tabulate import tabulate  # only needed for drawing
+
         headers = ["state", "counts"]
         d = []
         for key, value in self.counts.items():
-            d.append([str(key), value])
+            d.append([key, value])
         if sort:
-            d.sort()
+            d.sort(key=itemgetter(0))
         if IS_NOTEBOOK:
             table = tabulate(d, headers=headers, tablefmt="html")
             display(HTML(table))
@@ -320,13 +410,8 @@ class PhotonCount(dict):
         replace_dict : dict
             Dictionary of the replacement.
         """
-        replaced = {}
-        # Iterate over original measurement results
-        for key, value in self.counts.items():
-            if str(key) not in replace_dict:
-                continue
-            replaced[replace_dict[str(key)]] = value
-        self.counts = replaced
+        # Iterate over original measurement results, dropping those not in replace_dict
+        self.counts = {replace_dict[key]: value for key, value in self.counts.items() if key in replace_dict}
 
 
 class PhotonDistribution(dict):
@@ -334,24 +419,26 @@ class PhotonDistribution(dict):
 
     perceval.BSDistribution does not seem to show fock state with one qubit properly."""
 
-    def __init__(self, distribution: dict[str, float] = {}):
+    def __init__(self, distribution: dict[str, float] | None = None):
         # TODO: use sympy.physics.secondquant.FockStateBosonBra?
+        super().__init__()
+        if distribution is None:
+            self.distribution = {}
+            return
         if not isinstance(distribution, dict):
             raise TypeError("distribution must be a dictionary.")
-        super().__init__()
-        self.distribution = dict(distribution)
+        # keys are normalized to str once, as perceval may return BasicState keys
+        self.distribution = {str(key): value for key, value in distribution.items()}
 
     def __str__(self) -> str:
         return str(self.distribution)
 
-    def __getitem__(self, key: str) -> float:
-        if not isinstance(key, str):
-            raise TypeError("key must be a string.")
-        return self.distribution[key]
+    def __getitem__(self, key: str | pcvl.BasicState) -> float:
+        return self.distribution[key if isinstance(key, str) else str(key)]
 
-    def __setitem__(self, key: str, value: float):
+    def __setitem__(self, key: str | pcvl.BasicState, value: float):
         if not isinstance(key, str):
-            raise TypeError("key must be a string.")
+            key = str(key)
         if not isinstance(value, float):
             raise TypeError("value must be a float.")
         self.distribution[key] = value
@@ -359,6 +446,12 @@ class PhotonDistribution(dict):
     def items(self) -> dict_items:
         return self.distribution.items()
 
+    def as_array(self) -> tuple[list[str], np.ndarray]:
+        """Return the measurement results and their probabilities as a list of labels and an array in the same order."""
+        return list(self.distribution), np.fromiter(
+            self.distribution.values(), dtype=np.float64, count=len(self.distribution)
+        )
+
     def draw(self, sort: bool = True):
         """Draw the probability distribution in a table.
         If the code is run in a Jupyter notebook, the table will be displayed in HTML format.
@@ -369,12 +462,14 @@ class PhotonDistribution(dict):
         sort : bool, optional
             Whether to sort the distribution by the key.
         """
+        from tabulate import tabulate  # only needed for drawing
+
         headers = ["state", "probability"]
         d = []
         for key, value in self.distribution.items():
-            d.append([str(key), value])
+            d.append([key, value])
         if sort:
-            d.sort()
+            d.sort(key=itemgetter(0))
         if IS_NOTEBOOK:
             table = tabulate(d, headers=headers, tablefmt="html")
             display(HTML(table))
@@ -390,10 +485,7 @@ class PhotonDistribution(dict):
         replace_dict : dict
             Dictionary of the replacement.
         """
-        replaced = {}
-        # Iterate over original measurement results
-        for key, value in self.distribution.items():
-            if str(key) not in replace_dict:
-                continue
-            replaced[replace_dict[str(key)]] = value
-        self.distribution = replaced
+        # Iterate over original measurement results, dropping those not in replace_dict
+        self.distribution = {
+            replace_dict[key]: value for key, value in self.distribution.items() if key in replace_dict
+        }
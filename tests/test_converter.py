@@ -1,173 +1,225 @@
+import copy
+import math
 import unittest
+from functools import lru_cache
 
 import numpy as np
 from graphix import Circuit
+from graphix.extraction import get_fusion_network_from_graph
+from perceval import components as comp
+
+from graphix_perceval.converter import (
+    PercevalCircuitConstructor,
+    ghz_circuit,
+    linear_circuit,
+    local_clifford_circuit,
+    pattern2graphstate,
+    to_perceval,
+)
+from graphix_perceval.experiment import PhotonDistribution, PhotonType
+
+
+BELL = (2, (("h", 1), ("cnot", 0, 1)))  # initialize with |+> \otimes |+>
+GHZ = (3, (("h", 1), ("h", 2), ("cnot", 0, 1), ("cnot", 1, 2)))  # initialize with |+> \otimes |+> \otimes |+>
+
+ANS_RX = PhotonDistribution({"|0>": math.cos(math.pi / 1.23 / 2) ** 2, "|1>": math.sin(math.pi / 1.23 / 2) ** 2})
+_P_EVEN, _P_ODD = math.cos(math.pi / 8) ** 2 / 2, math.sin(math.pi / 8) ** 2 / 2
+ANS_BELL_RY = PhotonDistribution({"|00>": _P_EVEN, "|01>": _P_ODD, "|10>": _P_ODD, "|11>": _P_EVEN})
+
+
+@lru_cache(maxsize=None)
+def _standardized_pattern(n_qubits, gates):
+    circuit = Circuit(n_qubits)
+    for name, *args in gates:
+        getattr(circuit, name)(*args)
+    pattern = circuit.transpile()
+    pattern.standardize()
+    pattern.shift_signals()
+    return pattern
+
+
+def build_pattern(n_qubits, gates, pauli_meas=False):
+    """Build the standardized pattern of a circuit given as (gate name, *args) tuples.
+
+    Patterns are shared between tests, so a copy is made before performing the Pauli measurements in place.
+    """
+    pattern = _standardized_pattern(n_qubits, gates)
+    if pauli_meas:
+        pattern = copy.deepcopy(pattern)
+        pattern.perform_pauli_measurements()
+    return pattern
+
+
+@lru_cache(maxsize=None)
+def simulated_distribution(n_qubits, gates, pauli_meas=False):
+    """Postselected SLOS distribution of the pattern from :func:`build_pattern`, computed once per circuit.
+
+    The returned distribution is shared between tests and must not be modified.
+    """
+    exp = to_perceval(build_pattern(n_qubits, gates, pauli_meas))
+    exp.set_local_processor("SLOS")
+    return exp.get_probability_distribution()
+
 
-from graphix_perceval.converter import to_perceval
-from graphix_perceval.experiment import PhotonDistribution
+def assert_dist_close(dist, ans_dist, atol=1e-7):
+    """Check that every outcome of ``ans_dist`` appears in ``dist`` with the same probability."""
+    dist, ans_dist = dict(dist.items()), dict(ans_dist.items())
+    missing = ans_dist.keys() - dist.keys()
+    assert not missing, f"outcomes {sorted(missing)} are missing from the distribution"
+    np.testing.assert_allclose([dist[k] for k in ans_dist], list(ans_dist.values()), rtol=0, atol=atol)
 
 
 class TestConverter(unittest.TestCase):
     def test_sampling_circuit_wo_postselection(self):
-        circuit = Circuit(2)
-        circuit.h(1)
-        circuit.cnot(0, 1)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
+        pattern = build_pattern(*BELL)
 
         exp = to_perceval(pattern)
         exp.set_local_processor("SLOS")
-        dist = exp.sample(num_samples=1000, format_result=False, postselection=False)
-        counts = 0
-        for _, v in dist.items():
-            counts += v
-        self.assertEqual(counts, 1000)
+        dist = exp.sample(num_samples=16, format_result=False, postselection=False)
+        _, counts = dist.as_array()
+        self.assertEqual(counts.sum(), 16)
 
     def test_sampling_circuit_w_postselection(self):
-        circuit = Circuit(2)
-        circuit.h(1)
-        circuit.cnot(0, 1)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
+        pattern = build_pattern(*BELL)
 
         exp = to_perceval(pattern)
         exp.set_local_processor("SLOS")
-        dist = exp.sample(num_samples=1000)
-        counts = 0
-        for k, v in dist.items():
-            self.assertTrue(k in ["|00>", "|11>"])
-            counts += v
-        self.assertEqual(counts, 1000)
+        dist = exp.sample(num_samples=16)
+        labels, counts = dist.as_array()
+        self.assertTrue(np.isin(labels, ["|00>", "|11>"]).all())
+        self.assertEqual(counts.sum(), 16)
 
     def test_zero_state_creation_wo_pauli_meas(self):
-        circuit = Circuit(1)  # initialize with |+>
-        circuit.h(0)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-
-        exp = to_perceval(pattern)
-        exp.set_local_processor("SLOS")
-        dist = exp.get_probability_distribution()
+        dist = simulated_distribution(1, (("h", 0),))  # initialize with |+>
 
         ans_dist = PhotonDistribution({"|0>": 1.0})
-        self.assertAlmostEqual(dist["|0>"], ans_dist["|0>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, ans_dist)
 
     def test_one_state_creation_wo_pauli_meas(self):
-        circuit = Circuit(1)  # initialize with |+>
-        circuit.h(0)
-        circuit.x(0)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-
-        exp = to_perceval(pattern)
-        exp.set_local_processor("SLOS")
-        dist = exp.get_probability_distribution()
+        dist = simulated_distribution(1, (("h", 0), ("x", 0)))  # initialize with |+>
 
         ans_dist = PhotonDistribution({"|1>": 1.0})
-        self.assertAlmostEqual(dist["|1>"], ans_dist["|1>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, ans_dist)
 
     def test_rotated_one_qubit_state_creation_wo_pauli_meas(self):
-        circuit = Circuit(1)  # initialize with |+>
-        circuit.h(0)
-        circuit.rx(0, np.pi / 1.23)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-
-        exp = to_perceval(pattern)
-        exp.set_local_processor("SLOS")
-        dist = exp.get_probability_distribution()
+        dist = simulated_distribution(1, (("h", 0), ("rx", 0, np.pi / 1.23)))
 
-        ans_dist = PhotonDistribution({"|0>": np.cos(np.pi / 1.23 / 2) ** 2, "|1>": np.sin(np.pi / 1.23 / 2) ** 2})
-        self.assertAlmostEqual(dist["|0>"], ans_dist["|0>"])
-        self.assertAlmostEqual(dist["|1>"], ans_dist["|1>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, ANS_RX)
 
     def test_bell_state_phi_plus_creation_wo_pauli_meas(self):
-        circuit = Circuit(2)  # initialize with |+> \otimes |+>
-        circuit.h(1)
-        circuit.cnot(0, 1)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-
-        exp = to_perceval(pattern)
-        exp.set_local_processor("SLOS")
-        dist = exp.get_probability_distribution()
+        dist = simulated_distribution(*BELL)
 
         ans_dist = PhotonDistribution({"|00>": 0.5, "|11>": 0.5})
-        self.assertAlmostEqual(dist["|00>"], ans_dist["|00>"])
-        self.assertAlmostEqual(dist["|11>"], ans_dist["|11>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, ans_dist)
 
     def test_bell_state_phi_plus_creation_with_pauli_meas(self):
-        circuit = Circuit(2)  # initialize with |+> \otimes |+>
-        circuit.h(1)
-        circuit.cnot(0, 1)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-        pattern.perform_pauli_measurements()
+        dist = simulated_distribution(*BELL, pauli_meas=True)
+
+        ans_dist = PhotonDistribution({"|00>": 0.5, "|11>": 0.5})
+        assert_dist_close(dist, ans_dist)
+
+    def test_ghz_state_creation_with_pauli_meas(self):
+        dist = simulated_distribution(*GHZ, pauli_meas=True)
+
+        ans_dist = PhotonDistribution({"|000>": 0.5, "|111>": 0.5})
+        assert_dist_close(dist, ans_dist)
+
+    def test_bell_state_and_ry_with_pauli_meas(self):
+        dist = simulated_distribution(2, (("h", 1), ("cnot", 0, 1), ("ry", 1, np.pi / 4)), pauli_meas=True)
+
+        assert_dist_close(dist, ANS_BELL_RY)
+
+    def test_photon_buckets_match_photon_types(self):
+        pattern = build_pattern(*GHZ)
+
+        graph_state, phasedict, output_nodes = pattern2graphstate(pattern)
+        pcc = PercevalCircuitConstructor()
+        for resource_graph in get_fusion_network_from_graph(graph_state):
+            pcc.add_resourcegraph(resource_graph, phasedict, output_nodes)
+        pcc.add_fusions()
+
+        for photons, photon_type in (
+            (pcc.get_readouts(), PhotonType.READOUT),
+            (pcc.get_computes(), PhotonType.COMPUTE),
+            (pcc.get_witnesses(), PhotonType.WITNESS),
+        ):
+            self.assertEqual(photons, [ph for ph in pcc.photons if ph.type == photon_type])
+        self.assertTrue(len(pcc.get_witnesses()) > 0)
+        for ph1, ph2 in pcc.fusion_pairs:
+            self.assertEqual(ph1.node_id, ph2.node_id)
+            self.assertTrue(ph1.id < ph2.id)
+            self.assertIs(ph2.type, PhotonType.WITNESS)
+
+    def test_get_all_resourcegraphs(self):
+        pattern = build_pattern(*GHZ)
+
+        graph_state, phasedict, output_nodes = pattern2graphstate(pattern)
+        resource_graphs = get_fusion_network_from_graph(graph_state)
+        pcc = PercevalCircuitConstructor()
+        for resource_graph in resource_graphs:
+            pcc.add_resourcegraph(resource_graph, phasedict, output_nodes)
+
+        self.assertEqual(pcc.get_all_resourcegraphs(), list(resource_graphs))
+        self.assertEqual(
+            len(pcc.ghz_ResourceGraphs) + len(pcc.linear_ResourceGraphs), len(pcc.get_all_resourcegraphs())
+        )
+
+    def test_formatted_result_matches_output_states(self):
+        pattern = build_pattern(1, (("h", 0), ("rx", 0, np.pi / 1.23)))
 
         exp = to_perceval(pattern)
         exp.set_local_processor("SLOS")
-        dist = exp.get_probability_distribution()
+        dist = exp.get_probability_distribution(postselection=False)
+        raw_dist = exp.get_probability_distribution(format_result=False, postselection=False)
+        raw_dist.replace_keys(exp.output_states)
 
-        ans_dist = PhotonDistribution({"|00>": 0.5, "|11>": 0.5})
-        self.assertAlmostEqual(dist["|00>"], ans_dist["|00>"])
-        self.assertAlmostEqual(dist["|11>"], ans_dist["|11>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        self.assertEqual(len(exp.output_states), 2)
+        self.assertEqual(dist.distribution.keys(), raw_dist.distribution.keys())
+        assert_dist_close(dist, raw_dist)
 
-    def test_ghz_state_creation_with_pauli_meas(self):
-        circuit = Circuit(3)  # initialize with |+> \otimes |+> \otimes |+>
-        circuit.h(1)
-        circuit.h(2)
-        circuit.cnot(0, 1)
-        circuit.cnot(1, 2)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-        pattern.perform_pauli_measurements()
+    def test_assigned_output_states_format_results(self):
+        pattern = build_pattern(1, (("h", 0), ("rx", 0, np.pi / 1.23)))
 
         exp = to_perceval(pattern)
         exp.set_local_processor("SLOS")
+        exp.output_states = {k: "|q" + v[1:] for k, v in exp.output_states.items()}
         dist = exp.get_probability_distribution()
 
-        ans_dist = PhotonDistribution({"|000>": 0.5, "|111>": 0.5})
-        self.assertAlmostEqual(dist["|000>"], ans_dist["|000>"])
-        self.assertAlmostEqual(dist["|111>"], ans_dist["|111>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, PhotonDistribution({"|q0>": ANS_RX["|0>"], "|q1>": ANS_RX["|1>"]}))
+        self.assertEqual(len(dist.distribution), 2)
 
-    def test_bell_state_and_ry_with_pauli_meas(self):
-        circuit = Circuit(2)  # initialize with |+> \otimes |+> \otimes |+>
-        circuit.h(1)
-        circuit.cnot(0, 1)
-        circuit.ry(1, np.pi / 4)
-        pattern = circuit.transpile()
-        pattern.standardize()
-        pattern.shift_signals()
-        pattern.perform_pauli_measurements()
+    def test_output_states_edited_in_place_format_results(self):
+        pattern = build_pattern(1, (("h", 0), ("rx", 0, np.pi / 1.23)))
 
         exp = to_perceval(pattern)
         exp.set_local_processor("SLOS")
+        output_states = exp.output_states
+        for k, v in output_states.items():
+            output_states[k] = "|q" + v[1:]
         dist = exp.get_probability_distribution()
 
-        ans_dist = PhotonDistribution(
-            {
-                "|00>": (np.cos(np.pi / 8) / np.sqrt(2)) ** 2,
-                "|01>": (np.sin(np.pi / 8) / np.sqrt(2)) ** 2,
-                "|10>": (np.sin(np.pi / 8) / np.sqrt(2)) ** 2,
-                "|11>": (np.cos(np.pi / 8) / np.sqrt(2)) ** 2,
-            }
-        )
-        self.assertAlmostEqual(dist["|00>"], ans_dist["|00>"])
-        self.assertAlmostEqual(dist["|01>"], ans_dist["|01>"])
-        self.assertAlmostEqual(dist["|10>"], ans_dist["|10>"])
-        self.assertAlmostEqual(dist["|11>"], ans_dist["|11>"])
-        self.assertTrue(all(k in dist.keys() for k in ans_dist.keys()))
+        assert_dist_close(dist, PhotonDistribution({"|q0>": ANS_RX["|0>"], "|q1>": ANS_RX["|1>"]}))
+        self.assertEqual(len(dist.distribution), 2)
+
+        # the edited table is not reused once the output states are set again
+        with self.assertWarns(UserWarning):
+            exp.set_local_processor("SLOS")
+        self.assertEqual(sorted(exp.output_states.values()), ["|0>", "|1>"])
+
+    def test_circuit_builders_return_independent_circuits(self):
+        for build, arg in ((ghz_circuit, 3), (linear_circuit, 4), (local_clifford_circuit, 5)):
+            circ = build(arg)
+            expected = circ.compute_unitary()
+            circ.add(0, comp.HWP(np.pi / 8))
+            np.testing.assert_allclose(build(arg).compute_unitary(), expected)
+
+    def test_circuit_builders_validate_cached_arguments(self):
+        for build in (ghz_circuit, linear_circuit):
+            build(3)
+            with self.assertRaises(TypeError):
+                build(3.0)
+        with self.assertRaises(ValueError):
+            local_clifford_circuit(24)
+        local_clifford_circuit(3)
+        with self.assertRaises(TypeError):
+            local_clifford_circuit(3.0)
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import perceval as pcvl
+
+from graphix_perceval.experiment import PhotonCount, PhotonDistribution
+
+
+class TestPhotonResults(unittest.TestCase):
+    def test_keys_normalized_to_str(self):
+        counts = PhotonCount({pcvl.BasicState([0, 1]): 3, pcvl.BasicState([1, 0]): 5})
+        self.assertEqual(counts["|0,1>"], 3)
+        self.assertEqual(counts["|1,0>"], 5)
+
+        dist = PhotonDistribution({pcvl.BasicState([0, 1]): 0.25, pcvl.BasicState([1, 0]): 0.75})
+        self.assertEqual(dist["|0,1>"], 0.25)
+        self.assertEqual(dist["|1,0>"], 0.75)
+
+    def test_basicstate_keys_in_accessors(self):
+        counts = PhotonCount()
+        counts[pcvl.BasicState([0, 1])] = 3
+        self.assertEqual(counts["|0,1>"], 3)
+        self.assertEqual(counts[pcvl.BasicState([0, 1])], 3)
+
+        dist = PhotonDistribution()
+        dist[pcvl.BasicState([1, 0])] = 0.5
+        self.assertEqual(dist["|1,0>"], 0.5)
+        self.assertEqual(dist[pcvl.BasicState([1, 0])], 0.5)
+
+    def test_replace_keys(self):
+        counts = PhotonCount({pcvl.BasicState([0, 1]): 3, pcvl.BasicState([1, 0]): 5, pcvl.BasicState([1, 1]): 2})
+        counts.replace_keys({"|0,1>": "|0>", "|1,0>": "|1>"})
+        self.assertEqual(dict(counts.items()), {"|0>": 3, "|1>": 5})
+
+        dist = PhotonDistribution({pcvl.BasicState([0, 1]): 0.25, pcvl.BasicState([1, 1]): 0.75})
+        dist.replace_keys({"|0,1>": "|0>", "|1,0>": "|1>"})
+        self.assertEqual(dict(dist.items()), {"|0>": 0.25})
+
+    def test_as_array(self):
+        labels, counts = PhotonCount({"|0>": 3, "|1>": 5}).as_array()
+        self.assertEqual(labels, ["|0>", "|1>"])
+        np.testing.assert_array_equal(counts, [3, 5])
+        self.assertEqual(counts.dtype, np.int64)
+
+        labels, probs = PhotonDistribution({"|00>": 0.25, "|11>": 0.75}).as_array()
+        self.assertEqual(labels, ["|00>", "|11>"])
+        np.testing.assert_allclose(probs, [0.25, 0.75])
+
+        labels, probs = PhotonDistribution().as_array()
+        self.assertEqual(labels, [])
+        self.assertEqual(probs.shape, (0,))